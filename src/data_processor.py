@@ -14,6 +14,17 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# App groupings used to derive app_category
+SOCIAL_MEDIA_APPS = frozenset({'Instagram', 'Facebook', 'Twitter', 'Snapchat', 'TikTok'})
+ENTERTAINMENT_APPS = frozenset({'YouTube', 'Netflix', 'Spotify'})
+COMMUNICATION_APPS = frozenset({'WhatsApp', 'Telegram', 'Discord'})
+
+_APP_CATEGORIES = {
+    **{app: 'Social Media' for app in SOCIAL_MEDIA_APPS},
+    **{app: 'Entertainment' for app in ENTERTAINMENT_APPS},
+    **{app: 'Communication' for app in COMMUNICATION_APPS}
+}
+
 
 class DataProcessor:
     """Handles data loading, cleaning, and preprocessing."""
@@ -21,6 +32,7 @@ class DataProcessor:
     def __init__(self):
         """Initialize the DataProcessor."""
         self.processed_data = None
+        self._sample_pool = None
         
     def load_and_prepare_data(self, file_path: str) -> pd.DataFrame:
         """
@@ -32,12 +44,12 @@ class DataProcessor:
         Returns:
             Clean, prepared DataFrame
         """
-        logger.info(f"📊 Loading data from: {file_path}")
+        logger.info("📊 Loading data from: %s", file_path)
         
         try:
             # Load the CSV file
             df = pd.read_csv(file_path)
-            logger.info(f"✅ Loaded {len(df)} rows and {len(df.columns)} columns")
+            logger.info("✅ Loaded %d rows and %d columns", len(df), len(df.columns))
             
             # Perform data cleaning
             df_clean = self._clean_data(df)
@@ -45,16 +57,16 @@ class DataProcessor:
             # Perform feature engineering
             df_processed = self._engineer_features(df_clean)
             
-            logger.info(f"✅ Data processing completed. Final shape: {df_processed.shape}")
+            logger.info("✅ Data processing completed. Final shape: %s", df_processed.shape)
             self.processed_data = df_processed
             
             return df_processed
             
         except FileNotFoundError:
-            logger.error(f"❌ File not found: {file_path}")
+            logger.error("❌ File not found: %s", file_path)
             raise
         except Exception as e:
-            logger.error(f"❌ Error processing data: {str(e)}")
+            logger.error("❌ Error processing data: %s", e)
             raise
     
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -71,21 +83,24 @@ class DataProcessor:
         
         df_clean = df.copy()
         
+        # Only columns that actually have gaps need filling; check them all in one pass
+        missing = df_clean.columns[df_clean.isna().any()]
+        
         # Fill missing values
-        if 'usage_minutes' in df_clean.columns:
+        if 'usage_minutes' in missing:
             df_clean.loc[:, 'usage_minutes'] = df_clean['usage_minutes'].fillna(df_clean['usage_minutes'].median())
         
-        if 'app_name' in df_clean.columns:
+        if 'app_name' in missing:
             df_clean.loc[:, 'app_name'] = df_clean['app_name'].fillna('Unknown')
         
-        if 'roast_category_1' in df_clean.columns:
+        if 'roast_category_1' in missing:
             df_clean.loc[:, 'roast_category_1'] = df_clean['roast_category_1'].fillna('productivity')
         
-        if 'roast_intensity' in df_clean.columns:
+        if 'roast_intensity' in missing:
             df_clean.loc[:, 'roast_intensity'] = df_clean['roast_intensity'].fillna('medium')
         
         # Handle any other missing values
-        for col in df_clean.columns:
+        for col in missing:
             if df_clean[col].dtype == 'object':
                 df_clean.loc[:, col] = df_clean[col].fillna('Unknown')
             else:
@@ -97,9 +112,9 @@ class DataProcessor:
         removed_duplicates = initial_rows - len(df_clean)
         
         if removed_duplicates > 0:
-            logger.info(f"🗑️ Removed {removed_duplicates} duplicate rows")
+            logger.info("🗑️ Removed %d duplicate rows", removed_duplicates)
         
-        logger.info(f"✅ Data cleaning completed. Shape: {df_clean.shape}")
+        logger.info("✅ Data cleaning completed. Shape: %s", df_clean.shape)
         return df_clean
     
     def _engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -133,30 +148,16 @@ class DataProcessor:
                 labels=['Light', 'Moderate', 'Heavy', 'Extreme']
             ).astype(str)
         
-        # Create app categories
+        # Create app categories (vectorized hash lookup, unknown apps become 'Other')
         if 'app_name' in df_features.columns:
-            social_media_apps = ['Instagram', 'Facebook', 'Twitter', 'Snapchat', 'TikTok']
-            entertainment_apps = ['YouTube', 'Netflix', 'Spotify']
-            communication_apps = ['WhatsApp', 'Telegram', 'Discord']
-            
-            def categorize_app(app_name):
-                if app_name in social_media_apps:
-                    return 'Social Media'
-                elif app_name in entertainment_apps:
-                    return 'Entertainment'
-                elif app_name in communication_apps:
-                    return 'Communication'
-                else:
-                    return 'Other'
-            
-            df_features['app_category'] = df_features['app_name'].apply(categorize_app)
+            df_features['app_category'] = df_features['app_name'].map(_APP_CATEGORIES).fillna('Other')
         
         # Create time-based features
         if 'usage_minutes' in df_features.columns:
             df_features['usage_hours'] = df_features['usage_minutes'] / 60
             df_features['is_heavy_user'] = (df_features['usage_minutes'] > 180).astype(int)
         
-        logger.info(f"✅ Feature engineering completed. New shape: {df_features.shape}")
+        logger.info("✅ Feature engineering completed. New shape: %s", df_features.shape)
         return df_features
     
     def process_complete(self, file_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
@@ -229,6 +230,9 @@ class DataProcessor:
         """
         Get sample users for simulation.
         
+        Users are sliced from a pool shuffled once per processed dataset, so
+        repeated calls return the same users in the same order.
+        
         Args:
             n: Number of sample users to return
             
@@ -238,7 +242,15 @@ class DataProcessor:
         if self.processed_data is None:
             raise ValueError("No processed data available. Run load_and_prepare_data() first.")
         
-        return self.processed_data.sample(n=min(n, len(self.processed_data)))
+        if n < 0:
+            raise ValueError(f"Number of sample users must be non-negative, got {n}")
+        
+        # Shuffle once per dataset so sample users can be served as cheap slices
+        if self._sample_pool is None or self._sample_pool[0] is not self.processed_data:
+            pool = self.processed_data.sample(frac=1.0, random_state=42).reset_index(drop=True)
+            self._sample_pool = (self.processed_data, pool)
+        
+        return self._sample_pool[1].iloc[:n]
 
 
 def main():
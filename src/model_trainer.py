@@ -6,22 +6,29 @@ Handles ML model training and evaluation.
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import cross_val_score
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import OneHotEncoder, LabelEncoder
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 import logging
-from typing import Tuple, Dict, Any, List
+import math
+from typing import Tuple, Dict, Any, List, Optional
 import joblib
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Candidate model inputs, in the order they are fed to the encoder
+POTENTIAL_FEATURES = (
+    'app_name', 'app_category', 'day_of_week', 'usage_category',
+    'roast_category_1', 'roast_intensity', 'is_heavy_user'
+)
+
 
 class ModelTrainer:
     """Handles ML model training and evaluation."""
@@ -32,6 +39,13 @@ class ModelTrainer:
         self.encoder = None
         self.feature_columns = None
         self.target_column = 'usage_minutes'
+        self._numeric_features = None
+        self._cat_vocab = None
+        self._row_template = None
+        self._lin_w = None
+        self._lin_b = 0.0
+        self._feature_cache = {}
+        self._split_idx = None
         
     def train_and_evaluate(self, df: pd.DataFrame) -> Tuple[Any, Any]:
         """
@@ -46,14 +60,10 @@ class ModelTrainer:
         logger.info("🤖 Starting model training and evaluation...")
         
         # Select features and target
-        feature_columns = self._select_features(df)
+        feature_columns, categorical_features, numerical_features = self._get_feature_info(df)
         X = df[feature_columns]
         y = df[self.target_column]
         
-        # Perform one-hot encoding for categorical features
-        categorical_features = X.select_dtypes(include=['object']).columns.tolist()
-        numerical_features = X.select_dtypes(exclude=['object']).columns.tolist()
-        
         # Create preprocessor
         preprocessor = ColumnTransformer(
             transformers=[
@@ -63,9 +73,9 @@ class ModelTrainer:
         )
         
         # Split the data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        train_idx, test_idx = self._split_indices(len(X))
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
         
         # Create and train the model pipeline
         model_pipeline = Pipeline([
@@ -80,7 +90,7 @@ class ModelTrainer:
         
         # Evaluate the model
         mae = mean_absolute_error(y_test, y_pred)
-        logger.info(f"📊 Mean Absolute Error (MAE): {mae:.2f} minutes")
+        logger.info("📊 Mean Absolute Error (MAE): %.2f minutes", mae)
         
         # Store the trained model and feature info
         self.model = model_pipeline
@@ -94,31 +104,40 @@ class ModelTrainer:
         
         Args:
             df: Prepared DataFrame
-            model_type: Type of model ('random_forest', 'decision_tree', 'linear_regression')
+            model_type: Type of model ('random_forest', 'hist_gb', 'decision_tree', 'linear_regression')
             
         Returns:
             Dictionary with training results
         """
-        logger.info(f"🚀 Training {model_type} model...")
+        logger.info("🚀 Training %s model...", model_type)
         
         # Select features and target
-        feature_columns = self._select_features(df)
+        feature_columns, categorical_features, numerical_features = self._get_feature_info(df)
         X = df[feature_columns]
         y = df[self.target_column]
         
-        logger.info(f"📊 Features selected: {feature_columns}")
-        logger.info(f"🎯 Target variable: {self.target_column}")
+        logger.info("📊 Features selected: %s", feature_columns)
+        logger.info("🎯 Target variable: %s", self.target_column)
         
-        # Prepare data
-        X_processed, preprocessor = self._prepare_features(X)
+        # Prepare data (hist_gb handles categories natively, so skip one-hot encoding)
+        native_categorical = model_type == 'hist_gb'
+        X_processed, preprocessor = self._prepare_features(
+            X, native_categorical=native_categorical,
+            categorical_features=categorical_features, numerical_features=numerical_features
+        )
         
         # Split the data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_processed, y, test_size=0.2, random_state=42, stratify=None
-        )
+        train_idx, test_idx = self._split_indices(len(X_processed))
+        X_train, X_test = X_processed[train_idx], X_processed[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
         
         # Select and train model
         model = self._get_model(model_type)
+        if native_categorical:
+            categorical_mask = np.zeros(X_processed.shape[1], dtype=bool)
+            categorical_mask[preprocessor.output_indices_['cat']] = True
+            model.set_params(categorical_features=categorical_mask)
+        
         model.fit(X_train, y_train)
         
         # Make predictions
@@ -138,6 +157,8 @@ class ModelTrainer:
         self.model = model
         self.encoder = preprocessor
         self.feature_columns = feature_columns
+        self._build_single_row_encoder()
+        self._cache_linear_coefficients()
         
         results = {
             'model_type': model_type,
@@ -152,13 +173,32 @@ class ModelTrainer:
             'test_samples': len(X_test)
         }
         
-        logger.info(f"✅ Model training completed!")
-        logger.info(f"📊 Test MAE: {test_mae:.2f} minutes")
-        logger.info(f"📊 Test R²: {test_r2:.3f}")
-        logger.info(f"📊 CV R²: {cv_scores.mean():.3f} ± {cv_scores.std():.3f}")
+        logger.info("✅ Model training completed!")
+        logger.info("📊 Test MAE: %.2f minutes", test_mae)
+        logger.info("📊 Test R²: %.3f", test_r2)
+        logger.info("📊 CV R²: %.3f ± %.3f", cv_scores.mean(), cv_scores.std())
         
         return results
     
+    def _split_indices(self, n_samples: int, test_size: float = 0.2) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get deterministic train/test row indices, computed once per dataset size.
+        
+        Args:
+            n_samples: Number of rows to split
+            test_size: Fraction of rows held out for testing
+            
+        Returns:
+            Tuple of (train_indices, test_indices)
+        """
+        if self._split_idx is None or self._split_idx[0] != (n_samples, test_size):
+            # Same RNG and slicing as train_test_split(random_state=42), so the split is unchanged
+            permutation = np.random.RandomState(42).permutation(n_samples)
+            n_test = int(math.ceil(test_size * n_samples))
+            self._split_idx = ((n_samples, test_size), permutation[n_test:], permutation[:n_test])
+        
+        return self._split_idx[1], self._split_idx[2]
+    
     def _select_features(self, df: pd.DataFrame) -> List[str]:
         """
         Select relevant features for model training.
@@ -169,44 +209,75 @@ class ModelTrainer:
         Returns:
             List of feature column names
         """
-        # Define potential features
-        potential_features = [
-            'app_name', 'app_category', 'day_of_week', 'usage_category',
-            'roast_category_1', 'roast_intensity', 'is_heavy_user'
-        ]
-        
         # Select features that exist in the dataframe
-        available_features = [col for col in potential_features if col in df.columns]
+        available_features = [col for col in POTENTIAL_FEATURES if col in df.columns]
         
         # Ensure we have the target column
         if self.target_column not in df.columns:
             raise ValueError(f"Target column '{self.target_column}' not found in DataFrame")
         
-        logger.info(f"🎯 Selected {len(available_features)} features: {available_features}")
+        logger.info("🎯 Selected %d features: %s", len(available_features), available_features)
         return available_features
     
-    def _prepare_features(self, X: pd.DataFrame) -> Tuple[np.ndarray, ColumnTransformer]:
+    def _get_feature_info(self, df: pd.DataFrame) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Select features and split them by dtype, memoized per DataFrame schema.
+        
+        Args:
+            df: DataFrame to select features from
+            
+        Returns:
+            Tuple of (feature_columns, categorical_features, numerical_features)
+        """
+        # Keyed on column names and dtypes, so a schema change is a cache miss
+        schema_key = tuple(df.dtypes.items())
+        feature_info = self._feature_cache.get(schema_key)
+        
+        if feature_info is None:
+            feature_columns = self._select_features(df)
+            # Same dtype rule as _prepare_features, so string dtypes count as categorical too
+            X = df[feature_columns]
+            categorical_features = X.select_dtypes(include=['object']).columns.tolist()
+            numerical_features = X.select_dtypes(exclude=['object']).columns.tolist()
+            feature_info = (feature_columns, categorical_features, numerical_features)
+            self._feature_cache[schema_key] = feature_info
+        
+        return feature_info
+    
+    def _prepare_features(self, X: pd.DataFrame, native_categorical: bool = False,
+                          categorical_features: Optional[List[str]] = None,
+                          numerical_features: Optional[List[str]] = None) -> Tuple[np.ndarray, ColumnTransformer]:
         """
         Prepare features with proper encoding.
         
         Args:
             X: Feature DataFrame
+            native_categorical: Ordinal-encode categories for models with native
+                categorical support instead of one-hot encoding them
+            categorical_features: Precomputed categorical columns (inferred from dtypes if None)
+            numerical_features: Precomputed numerical columns (inferred from dtypes if None)
             
         Returns:
             Tuple of (processed_features, preprocessor)
         """
-        categorical_features = X.select_dtypes(include=['object']).columns.tolist()
-        numerical_features = X.select_dtypes(exclude=['object']).columns.tolist()
+        if categorical_features is None or numerical_features is None:
+            categorical_features = X.select_dtypes(include=['object']).columns.tolist()
+            numerical_features = X.select_dtypes(exclude=['object']).columns.tolist()
+        
+        logger.info("📊 Categorical features: %s", categorical_features)
+        logger.info("📊 Numerical features: %s", numerical_features)
         
-        logger.info(f"📊 Categorical features: {categorical_features}")
-        logger.info(f"📊 Numerical features: {numerical_features}")
+        if native_categorical:
+            # Unknown categories become NaN, which hist_gb treats as missing
+            categorical_encoder = OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan)
+        else:
+            categorical_encoder = OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore')
         
         # Create preprocessor
         preprocessor = ColumnTransformer(
             transformers=[
                 ('num', 'passthrough', numerical_features),
-                ('cat', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore'), 
-                 categorical_features)
+                ('cat', categorical_encoder, categorical_features)
             ]
         )
         
@@ -226,6 +297,12 @@ class ModelTrainer:
             Model instance
         """
         models = {
+            'hist_gb': HistGradientBoostingRegressor(
+                max_iter=200,
+                max_depth=8,
+                learning_rate=0.05,
+                random_state=42
+            ),
             'random_forest': RandomForestRegressor(
                 n_estimators=100,
                 max_depth=10,
@@ -260,21 +337,100 @@ class ModelTrainer:
         if self.model is None:
             raise ValueError("Model not trained yet. Call train_model() first.")
         
-        # Select the same features used in training
-        X = user_data[self.feature_columns]
-        
         # If using the simple pipeline model
         if hasattr(self.model, 'predict'):
             if hasattr(self.model, 'named_steps'):  # Pipeline
-                predictions = self.model.predict(X)
+                predictions = self.model.predict(user_data[self.feature_columns])
             else:  # Direct model with separate encoder
-                X_processed = self.encoder.transform(X)
-                predictions = self.model.predict(X_processed)
+                X_processed = None
+                if len(user_data) == 1 and self._cat_vocab is not None:  # Single user fast path
+                    X_processed = self._encode_single_row(user_data)
+                if X_processed is None:  # Batches, and rows the fast path cannot encode
+                    X_processed = self.encoder.transform(user_data[self.feature_columns])
+                
+                if self._lin_w is not None:  # Closed-form linear prediction
+                    predictions = X_processed @ self._lin_w + self._lin_b
+                else:
+                    predictions = self.model.predict(X_processed)
         else:
             raise ValueError("Invalid model state")
         
         return predictions
     
+    def _cache_linear_coefficients(self) -> None:
+        """Cache weights of a linear model so prediction is a single matrix-vector product."""
+        if isinstance(self.model, LinearRegression):
+            self._lin_w = np.asarray(self.model.coef_, dtype=float)
+            self._lin_b = float(self.model.intercept_)
+        else:
+            self._lin_w = None
+            self._lin_b = 0.0
+    
+    def _build_single_row_encoder(self) -> None:
+        """
+        Precompute category lookups from the fitted encoder so single rows
+        can be encoded without going through ColumnTransformer.transform.
+        """
+        self._numeric_features = []
+        self._cat_vocab = {}
+        unknown_values = {}
+        position = 0
+        
+        for name, transformer, columns in self.encoder.transformers_:
+            if name == 'num':
+                self._numeric_features = list(columns)
+                position += len(columns)
+        
+        for name, transformer, columns in self.encoder.transformers_:
+            if name != 'cat' or len(columns) == 0:
+                continue
+            for i, col in enumerate(columns):
+                vocab = {}
+                if isinstance(transformer, OrdinalEncoder):
+                    for code, category in enumerate(transformer.categories_[i]):
+                        vocab[category] = (position, float(code))
+                    unknown_values[position] = transformer.unknown_value
+                    position += 1
+                else:
+                    drop_idx = transformer.drop_idx_[i] if transformer.drop_idx_ is not None else None
+                    for j, category in enumerate(transformer.categories_[i]):
+                        if j == drop_idx:
+                            continue
+                        vocab[category] = (position, 1.0)
+                        position += 1
+                self._cat_vocab[col] = vocab
+        
+        self._row_template = np.zeros(position)
+        for unknown_position, unknown_value in unknown_values.items():
+            self._row_template[unknown_position] = unknown_value
+    
+    def _encode_single_row(self, user_data: pd.DataFrame) -> Optional[np.ndarray]:
+        """
+        Encode a single-row DataFrame with the precomputed category lookups.
+        
+        Args:
+            user_data: DataFrame with exactly one row of user features
+            
+        Returns:
+            Array of shape (1, n_encoded_features), or None if a categorical value
+            is missing and the row must go through the fitted encoder instead
+        """
+        row = self._row_template.copy()
+        
+        for i, col in enumerate(self._numeric_features):
+            row[i] = user_data[col].iat[0]
+        
+        # Unknown categories keep the template value, matching the fitted encoder
+        for col, vocab in self._cat_vocab.items():
+            value = user_data[col].iat[0]
+            if pd.isna(value):
+                return None
+            encoded = vocab.get(value)
+            if encoded is not None:
+                row[encoded[0]] = encoded[1]
+        
+        return row.reshape(1, -1)
+    
     def evaluate_model(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
         Comprehensive model evaluation.
@@ -290,23 +446,29 @@ class ModelTrainer:
         
         logger.info("📈 Evaluating model performance...")
         
-        # Prepare data
-        X = df[self.feature_columns]
-        y = df[self.target_column]
-        
         # Make predictions
+        y = df[self.target_column].to_numpy(dtype=float)
         predictions = self.predict_usage(df)
         
-        # Calculate metrics
-        mae = mean_absolute_error(y, predictions)
-        mse = mean_squared_error(y, predictions)
-        rmse = np.sqrt(mse)
-        r2 = r2_score(y, predictions)
+        # Calculate metrics from a single residual array
+        residual = y - predictions
+        abs_residual = np.abs(residual)
+        mae = abs_residual.mean()
+        mse = (residual * residual).mean()
+        rmse = math.sqrt(mse)
+        
+        y_mean = y.mean()
+        y_var = y.var()
+        r2 = 1 - mse / y_var if y_var > 0 else r2_score(y, predictions)
+        
+        # Sample standard deviation (ddof=1), as pandas reports it
+        n_samples = len(y)
+        std_actual = math.sqrt(y_var * n_samples / (n_samples - 1)) if n_samples > 1 else float('nan')
         
         # Calculate accuracy within different thresholds
-        accuracy_10min = np.mean(np.abs(y - predictions) <= 10)
-        accuracy_30min = np.mean(np.abs(y - predictions) <= 30)
-        accuracy_60min = np.mean(np.abs(y - predictions) <= 60)
+        accuracy_10min = np.mean(abs_residual <= 10)
+        accuracy_30min = np.mean(abs_residual <= 30)
+        accuracy_60min = np.mean(abs_residual <= 60)
         
         evaluation_results = {
             'mae': mae,
@@ -316,16 +478,16 @@ class ModelTrainer:
             'accuracy_within_10min': accuracy_10min,
             'accuracy_within_30min': accuracy_30min,
             'accuracy_within_60min': accuracy_60min,
-            'mean_actual': y.mean(),
+            'mean_actual': y_mean,
             'mean_predicted': predictions.mean(),
-            'std_actual': y.std(),
+            'std_actual': std_actual,
             'std_predicted': predictions.std()
         }
         
-        logger.info(f"📊 Evaluation Results:")
-        logger.info(f"   MAE: {mae:.2f} minutes")
-        logger.info(f"   R²: {r2:.3f}")
-        logger.info(f"   Accuracy within 30min: {accuracy_30min:.1%}")
+        logger.info("📊 Evaluation Results:")
+        logger.info("   MAE: %.2f minutes", mae)
+        logger.info("   R²: %.3f", r2)
+        logger.info("   Accuracy within 30min: %.1f%%", accuracy_30min * 100)
         
         return evaluation_results
     
@@ -347,7 +509,7 @@ class ModelTrainer:
         }
         
         joblib.dump(model_data, filepath)
-        logger.info(f"💾 Model saved to: {filepath}")
+        logger.info("💾 Model saved to: %s", filepath)
     
     def load_model(self, filepath: str) -> None:
         """
@@ -363,7 +525,11 @@ class ModelTrainer:
         self.feature_columns = model_data['feature_columns']
         self.target_column = model_data['target_column']
         
-        logger.info(f"📂 Model loaded from: {filepath}")
+        if self.encoder is not None and not hasattr(self.model, 'named_steps'):
+            self._build_single_row_encoder()
+            self._cache_linear_coefficients()
+        
+        logger.info("📂 Model loaded from: %s", filepath)
 
 
 def main():
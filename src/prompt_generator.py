@@ -5,17 +5,210 @@ Creates dynamic prompts for the Gemini API based on user context and predictions
 """
 
 import logging
-from typing import Dict, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Final, Mapping, Tuple
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _frozen(table: Dict) -> Mapping:
+    """Return a read-only view of a lookup table, including nested tables."""
+    return MappingProxyType({
+        key: _frozen(value) if isinstance(value, dict) else value
+        for key, value in table.items()
+    })
+
+
+# Instructions shared by every roast prompt. Keeping them as an identical leading
+# block lets Gemini's prompt cache reuse them; only the user context varies.
+STATIC_SYSTEM_PROMPT: Final[str] = """You are a witty, culturally aware AI roast generator that creates personalized, humorous critiques of people's screen time habits. Your job is to create a roast in the tone given in the user context while being entertaining and thought-provoking.
+
+ROAST REQUIREMENTS:
+1. **Tone**: Use the tone given in the user context
+2. **Opening**: Start with something like the suggested opening
+3. **Focus Area**: Emphasize the focus area given in the user context
+4. **Cultural Elements**: Include Hinglish phrases and Indian cultural references where appropriate
+5. **Length**: 3-4 sentences maximum
+6. **Style**: Mix of humor, reality check, and motivation
+
+INTENSITY GUIDELINES:
+- Light: Gentle nudging with humor, encouraging tone
+- Medium: Direct reality check with balanced humor and concern
+- Brutal: Savage, no-holds-barred roasting with harsh truths
+
+Generate a roast that will make the user laugh, think, and maybe feel a little called out. End with something motivational like the suggested closing.
+
+Remember: Be witty, be real, but don't be mean-spirited. The goal is to create awareness through humor, not to hurt feelings."""
+
+
+# Static instructions plus the separator, joined once at import
+_STATIC_PROMPT_PREFIX: Final[str] = STATIC_SYSTEM_PROMPT + "\n\n"
+
+# Per-user context appended after STATIC_SYSTEM_PROMPT
+_USER_CONTEXT_TEMPLATE: Final[str] = """USER CONTEXT:
+- App: {app_name}
+- Predicted Usage Time: {usage_text}
+- Primary Concern: {roast_category}
+- Roast Intensity: {roast_intensity}
+- Tone: {tone}
+- Suggested Opening: "{tone_opening}"
+- Focus Area: {category_focus}
+- Suggested Closing: "{tone_closing}"
+
+APP-SPECIFIC CONTEXT:
+- Addiction Type: {addiction_type}
+- Typical Behavior: {typical_behavior}
+- Time Waste Pattern: {time_waste}
+
+SPECIFIC FOCUS:
+The user is predicted to spend {usage_text} on {app_name}, which involves {addiction_type}. Focus on {category_focus} and make it relatable to someone who spends this much time {typical_behavior}."""
+
+# App-specific context
+_APP_CONTEXTS: Final[Mapping[str, Mapping[str, str]]] = _frozen({
+    "Instagram": {
+        "addiction_type": "social comparison and endless scrolling",
+        "typical_behavior": "double-tapping photos and watching stories",
+        "time_waste": "comparing your life to others' highlight reels"
+    },
+    "TikTok": {
+        "addiction_type": "short-form video binge-watching",
+        "typical_behavior": "swiping up for 'just one more video'",
+        "time_waste": "watching dance videos and random content"
+    },
+    "YouTube": {
+        "addiction_type": "video binge-watching and rabbit holes",
+        "typical_behavior": "falling into recommendation loops",
+        "time_waste": "watching 'educational' videos that aren't really educational"
+    },
+    "Twitter": {
+        "addiction_type": "news and social media drama consumption",
+        "typical_behavior": "doom-scrolling and engaging in arguments",
+        "time_waste": "reading hot takes and getting angry at strangers"
+    },
+    "Reddit": {
+        "addiction_type": "endless thread reading and discussion",
+        "typical_behavior": "going down comment rabbit holes",
+        "time_waste": "reading debates about topics you don't care about"
+    },
+    "Facebook": {
+        "addiction_type": "social networking and news feed scrolling",
+        "typical_behavior": "checking what everyone is up to",
+        "time_waste": "reading posts from people you barely know"
+    },
+    "WhatsApp": {
+        "addiction_type": "constant messaging and group chat monitoring",
+        "typical_behavior": "checking messages every few minutes",
+        "time_waste": "reading forwarded messages and group drama"
+    },
+    "Netflix": {
+        "addiction_type": "binge-watching shows and movies",
+        "typical_behavior": "saying 'just one more episode'",
+        "time_waste": "watching shows you don't even enjoy"
+    },
+    "Snapchat": {
+        "addiction_type": "story viewing and snap streaks",
+        "typical_behavior": "maintaining streaks and checking stories",
+        "time_waste": "sending meaningless snaps to keep streaks alive"
+    },
+    "Spotify": {
+        "addiction_type": "music streaming and playlist creation",
+        "typical_behavior": "constantly switching songs and creating playlists",
+        "time_waste": "spending more time choosing music than listening"
+    }
+})
+
+_DEFAULT_APP_CONTEXT: Final[Mapping[str, str]] = _frozen({
+    "addiction_type": "digital content consumption",
+    "typical_behavior": "mindless scrolling and tapping",
+    "time_waste": "consuming content that adds no value to your life"
+})
+
+# Intensity-based tone
+_INTENSITY_TONES: Final[Mapping[str, Mapping[str, str]]] = _frozen({
+    "light": {
+        "opening": "Hey there, digital explorer! 😊",
+        "tone": "friendly and encouraging",
+        "closing": "Maybe it's time for a little digital detox? 🌱"
+    },
+    "medium": {
+        "opening": "Alright, let's talk about your screen time habits! 📱",
+        "tone": "direct but supportive",
+        "closing": "Time to take control of your digital life! 💪"
+    },
+    "brutal": {
+        "opening": "Bro, we need to have a serious conversation! 🔥",
+        "tone": "brutally honest and savage",
+        "closing": "Wake up and smell the reality! ⏰"
+    }
+})
+
+_DEFAULT_INTENSITY_TONE: Final[Mapping[str, str]] = _INTENSITY_TONES["medium"]
+
+# Category-specific focus areas
+_CATEGORY_FOCUSES: Final[Mapping[str, str]] = _frozen({
+    "social_life": "how this app usage is affecting your real-world relationships and social interactions",
+    "career": "how this excessive screen time is impacting your professional growth and productivity",
+    "health": "how this digital addiction is affecting your physical and mental well-being",
+    "finance": "how this time could be better spent on improving your financial situation",
+    "laziness": "how this app is enabling your procrastination and lazy habits",
+    "productivity": "how this usage is destroying your focus and ability to get things done"
+})
+
+_DEFAULT_CATEGORY_FOCUS: Final[str] = "how this excessive usage is impacting your overall life balance"
+
+# App-specific insights (excuses are tuples so the shared entries cannot be modified)
+_APP_INSIGHTS: Final[Dict[str, Dict]] = {
+    "Instagram": {
+        "primary_addiction": "Visual social comparison",
+        "common_excuses": ("Just checking stories", "Looking for inspiration"),
+        "reality_check": "You're comparing your behind-the-scenes to others' highlight reels",
+        "alternative_activity": "Go create real memories instead of consuming others'"
+    },
+    "TikTok": {
+        "primary_addiction": "Dopamine-driven short content",
+        "common_excuses": ("It's educational", "Just for a few minutes"),
+        "reality_check": "Your attention span is getting shorter with each swipe",
+        "alternative_activity": "Learn a real skill that takes more than 60 seconds"
+    },
+    "YouTube": {
+        "primary_addiction": "Information overload and entertainment",
+        "common_excuses": ("I'm learning something", "It's research"),
+        "reality_check": "Watching productivity videos doesn't make you productive",
+        "alternative_activity": "Actually practice what you've been watching tutorials about"
+    },
+    "Twitter": {
+        "primary_addiction": "News and opinion consumption",
+        "common_excuses": ("Staying informed", "Networking"),
+        "reality_check": "You're getting angry at strangers' opinions all day",
+        "alternative_activity": "Have real conversations with people you actually know"
+    },
+    "Reddit": {
+        "primary_addiction": "Discussion and community browsing",
+        "common_excuses": ("Learning from discussions", "Community engagement"),
+        "reality_check": "You're reading debates about topics you'll forget tomorrow",
+        "alternative_activity": "Join a real community or hobby group offline"
+    }
+}
+
+_DEFAULT_APP_INSIGHT: Final[Dict] = {
+    "primary_addiction": "Digital content consumption",
+    "common_excuses": ("Just checking quickly", "It's important"),
+    "reality_check": "You're spending precious time on things that don't matter",
+    "alternative_activity": "Do something that actually improves your life"
+}
+
+
 def generate_roast_prompt(app_name: str, predicted_usage: float, roast_category: str, roast_intensity: str) -> str:
     """
     Generate a dynamic roast prompt for the Gemini API.
     
+    The prompt is STATIC_SYSTEM_PROMPT followed by the user-specific context,
+    so every prompt shares the same cacheable prefix. Prompts are memoized per
+    (app, usage rounded to the minute, category, intensity).
+    
     Args:
         app_name: Name of the app (e.g., "Instagram", "TikTok")
         predicted_usage: Predicted usage time in minutes
@@ -25,148 +218,98 @@ def generate_roast_prompt(app_name: str, predicted_usage: float, roast_category:
     Returns:
         Formatted prompt string ready for Gemini API
     """
+    predicted_minutes = int(round(predicted_usage))
+    prompt = _build_roast_prompt(app_name, predicted_minutes, roast_category, roast_intensity)
     
-    # Convert usage to hours and minutes for better readability
-    hours = int(predicted_usage // 60)
-    minutes = int(predicted_usage % 60)
-    
-    if hours > 0:
-        usage_text = f"{hours} hours and {minutes} minutes" if minutes > 0 else f"{hours} hours"
-    else:
-        usage_text = f"{minutes} minutes"
-    
-    # App-specific context
-    app_contexts = {
-        "Instagram": {
-            "addiction_type": "social comparison and endless scrolling",
-            "typical_behavior": "double-tapping photos and watching stories",
-            "time_waste": "comparing your life to others' highlight reels"
-        },
-        "TikTok": {
-            "addiction_type": "short-form video binge-watching",
-            "typical_behavior": "swiping up for 'just one more video'",
-            "time_waste": "watching dance videos and random content"
-        },
-        "YouTube": {
-            "addiction_type": "video binge-watching and rabbit holes",
-            "typical_behavior": "falling into recommendation loops",
-            "time_waste": "watching 'educational' videos that aren't really educational"
-        },
-        "Twitter": {
-            "addiction_type": "news and social media drama consumption",
-            "typical_behavior": "doom-scrolling and engaging in arguments",
-            "time_waste": "reading hot takes and getting angry at strangers"
-        },
-        "Reddit": {
-            "addiction_type": "endless thread reading and discussion",
-            "typical_behavior": "going down comment rabbit holes",
-            "time_waste": "reading debates about topics you don't care about"
-        },
-        "Facebook": {
-            "addiction_type": "social networking and news feed scrolling",
-            "typical_behavior": "checking what everyone is up to",
-            "time_waste": "reading posts from people you barely know"
-        },
-        "WhatsApp": {
-            "addiction_type": "constant messaging and group chat monitoring",
-            "typical_behavior": "checking messages every few minutes",
-            "time_waste": "reading forwarded messages and group drama"
-        },
-        "Netflix": {
-            "addiction_type": "binge-watching shows and movies",
-            "typical_behavior": "saying 'just one more episode'",
-            "time_waste": "watching shows you don't even enjoy"
-        },
-        "Snapchat": {
-            "addiction_type": "story viewing and snap streaks",
-            "typical_behavior": "maintaining streaks and checking stories",
-            "time_waste": "sending meaningless snaps to keep streaks alive"
-        },
-        "Spotify": {
-            "addiction_type": "music streaming and playlist creation",
-            "typical_behavior": "constantly switching songs and creating playlists",
-            "time_waste": "spending more time choosing music than listening"
-        }
-    }
+    # Logged outside the cache so repeat users are reported too
+    logger.info("✅ Generated roast prompt for %s (%s, %s intensity)",
+                app_name, _format_usage_text(predicted_minutes), roast_intensity)
+    return prompt
+
+
+@lru_cache(maxsize=256)
+def _build_roast_prompt(app_name: str, predicted_minutes: int, roast_category: str, roast_intensity: str) -> str:
+    """Build and cache the full roast prompt for a whole-minute usage value."""
+    user_context = generate_user_context_prompt(app_name, predicted_minutes, roast_category, roast_intensity)
+    return _STATIC_PROMPT_PREFIX + user_context
+
+
+def generate_user_context_prompt(app_name: str, predicted_usage: float, roast_category: str,
+                                 roast_intensity: str) -> str:
+    """
+    Generate the user-specific part of the roast prompt.
     
-    # Get app-specific context or use generic
-    app_context = app_contexts.get(app_name, {
-        "addiction_type": "digital content consumption",
-        "typical_behavior": "mindless scrolling and tapping",
-        "time_waste": "consuming content that adds no value to your life"
-    })
+    Can be sent on its own when STATIC_SYSTEM_PROMPT is passed to Gemini as
+    the system instruction.
     
-    # Intensity-based tone
-    intensity_tones = {
-        "light": {
-            "opening": "Hey there, digital explorer! 😊",
-            "tone": "friendly and encouraging",
-            "closing": "Maybe it's time for a little digital detox? 🌱"
-        },
-        "medium": {
-            "opening": "Alright, let's talk about your screen time habits! 📱",
-            "tone": "direct but supportive",
-            "closing": "Time to take control of your digital life! 💪"
-        },
-        "brutal": {
-            "opening": "Bro, we need to have a serious conversation! 🔥",
-            "tone": "brutally honest and savage",
-            "closing": "Wake up and smell the reality! ⏰"
-        }
-    }
+    Args:
+        app_name: Name of the app (e.g., "Instagram", "TikTok")
+        predicted_usage: Predicted usage time in minutes
+        roast_category: Category of roast (e.g., "social_life", "career", "health")
+        roast_intensity: Intensity level ("light", "medium", "brutal")
+        
+    Returns:
+        Formatted user context string
+    """
     
-    tone_config = intensity_tones.get(roast_intensity, intensity_tones["medium"])
+    # Quantize to whole minutes; sub-minute differences produce the same text
+    usage_text = _format_usage_text(int(round(predicted_usage)))
     
-    # Category-specific focus areas
-    category_focuses = {
-        "social_life": "how this app usage is affecting your real-world relationships and social interactions",
-        "career": "how this excessive screen time is impacting your professional growth and productivity",
-        "health": "how this digital addiction is affecting your physical and mental well-being",
-        "finance": "how this time could be better spent on improving your financial situation",
-        "laziness": "how this app is enabling your procrastination and lazy habits",
-        "productivity": "how this usage is destroying your focus and ability to get things done"
-    }
+    # Get app, tone and category context, falling back to generic defaults
+    app_context, tone_config, category_focus = _resolve_roast_context(app_name, roast_category, roast_intensity)
     
-    category_focus = category_focuses.get(roast_category, "how this excessive usage is impacting your overall life balance")
+    # Render the user-specific context in a single format pass
+    prompt = _USER_CONTEXT_TEMPLATE.format_map({
+        'app_name': app_name,
+        'usage_text': usage_text,
+        'roast_category': roast_category,
+        'roast_intensity': roast_intensity,
+        'tone': tone_config['tone'],
+        'tone_opening': tone_config['opening'],
+        'tone_closing': tone_config['closing'],
+        'category_focus': category_focus,
+        'addiction_type': app_context['addiction_type'],
+        'typical_behavior': app_context['typical_behavior'],
+        'time_waste': app_context['time_waste']
+    })
     
-    # Build the comprehensive prompt
-    prompt = f"""
-You are a witty, culturally aware AI roast generator that creates personalized, humorous critiques of people's screen time habits. Your job is to create a roast that's {tone_config['tone']} while being entertaining and thought-provoking.
-
-USER CONTEXT:
-- App: {app_name}
-- Predicted Usage Time: {usage_text}
-- Primary Concern: {roast_category}
-- Roast Intensity: {roast_intensity}
-
-APP-SPECIFIC CONTEXT:
-- Addiction Type: {app_context['addiction_type']}
-- Typical Behavior: {app_context['typical_behavior']}
-- Time Waste Pattern: {app_context['time_waste']}
-
-ROAST REQUIREMENTS:
-1. **Tone**: {tone_config['tone']}
-2. **Opening**: Start with something like "{tone_config['opening']}"
-3. **Focus Area**: Emphasize {category_focus}
-4. **Cultural Elements**: Include Hinglish phrases and Indian cultural references where appropriate
-5. **Length**: 3-4 sentences maximum
-6. **Style**: Mix of humor, reality check, and motivation
+    return prompt
 
-SPECIFIC FOCUS:
-The user is predicted to spend {usage_text} on {app_name}, which involves {app_context['addiction_type']}. Focus on {category_focus} and make it relatable to someone who spends this much time {app_context['typical_behavior']}.
 
-INTENSITY GUIDELINES:
-- Light: Gentle nudging with humor, encouraging tone
-- Medium: Direct reality check with balanced humor and concern
-- Brutal: Savage, no-holds-barred roasting with harsh truths
+def _resolve_roast_context(app_name: str, roast_category: str,
+                           roast_intensity: str) -> Tuple[Mapping, Mapping, str]:
+    """
+    Resolve the app context, intensity tone and category focus for a roast.
+    
+    Args:
+        app_name: Name of the app
+        roast_category: Category of roast
+        roast_intensity: Intensity level
+        
+    Returns:
+        Tuple of (app_context, tone_config, category_focus)
+    """
+    app_context = _APP_CONTEXTS.get(app_name) or _DEFAULT_APP_CONTEXT
+    tone_config = _INTENSITY_TONES.get(roast_intensity) or _DEFAULT_INTENSITY_TONE
+    category_focus = _CATEGORY_FOCUSES.get(roast_category) or _DEFAULT_CATEGORY_FOCUS
+    return app_context, tone_config, category_focus
 
-Generate a roast that will make the user laugh, think, and maybe feel a little called out. End with something motivational like "{tone_config['closing']}"
 
-Remember: Be witty, be real, but don't be mean-spirited. The goal is to create awareness through humor, not to hurt feelings.
-"""
+def _format_usage_text(predicted_minutes: int) -> str:
+    """
+    Convert usage to hours and minutes for better readability.
+    
+    Args:
+        predicted_minutes: Usage time in whole minutes
+        
+    Returns:
+        Human-readable usage string
+    """
+    hours, minutes = divmod(predicted_minutes, 60)
     
-    logger.info(f"✅ Generated roast prompt for {app_name} ({usage_text}, {roast_intensity} intensity)")
-    return prompt.strip()
+    if hours > 0:
+        return f"{hours} hours and {minutes} minutes" if minutes > 0 else f"{hours} hours"
+    return f"{minutes} minutes"
 
 
 def generate_simple_roast_prompt(app_name: str, predicted_usage: float) -> str:
@@ -193,45 +336,8 @@ def get_app_specific_insights(app_name: str) -> Dict:
     Returns:
         Dictionary with app insights
     """
-    insights = {
-        "Instagram": {
-            "primary_addiction": "Visual social comparison",
-            "common_excuses": ["Just checking stories", "Looking for inspiration"],
-            "reality_check": "You're comparing your behind-the-scenes to others' highlight reels",
-            "alternative_activity": "Go create real memories instead of consuming others'"
-        },
-        "TikTok": {
-            "primary_addiction": "Dopamine-driven short content",
-            "common_excuses": ["It's educational", "Just for a few minutes"],
-            "reality_check": "Your attention span is getting shorter with each swipe",
-            "alternative_activity": "Learn a real skill that takes more than 60 seconds"
-        },
-        "YouTube": {
-            "primary_addiction": "Information overload and entertainment",
-            "common_excuses": ["I'm learning something", "It's research"],
-            "reality_check": "Watching productivity videos doesn't make you productive",
-            "alternative_activity": "Actually practice what you've been watching tutorials about"
-        },
-        "Twitter": {
-            "primary_addiction": "News and opinion consumption",
-            "common_excuses": ["Staying informed", "Networking"],
-            "reality_check": "You're getting angry at strangers' opinions all day",
-            "alternative_activity": "Have real conversations with people you actually know"
-        },
-        "Reddit": {
-            "primary_addiction": "Discussion and community browsing",
-            "common_excuses": ["Learning from discussions", "Community engagement"],
-            "reality_check": "You're reading debates about topics you'll forget tomorrow",
-            "alternative_activity": "Join a real community or hobby group offline"
-        }
-    }
-    
-    return insights.get(app_name, {
-        "primary_addiction": "Digital content consumption",
-        "common_excuses": ["Just checking quickly", "It's important"],
-        "reality_check": "You're spending precious time on things that don't matter",
-        "alternative_activity": "Do something that actually improves your life"
-    })
+    insight = _APP_INSIGHTS.get(app_name, _DEFAULT_APP_INSIGHT)
+    return {**insight, "common_excuses": list(insight["common_excuses"])}
 
 
 def main():
@@ -251,7 +357,9 @@ def main():
         print(f"\n📱 {app.upper()} - {usage} minutes ({intensity} intensity)")
         print("-" * 40)
         prompt = generate_roast_prompt(app, usage, category, intensity)
-        print(prompt[:200] + "..." if len(prompt) > 200 else prompt)
+        # Every prompt opens with the same static instructions, so show the user context
+        user_context = prompt[len(_STATIC_PROMPT_PREFIX):]
+        print(user_context[:200] + "..." if len(user_context) > 200 else user_context)
         print()
 
 
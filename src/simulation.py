@@ -4,24 +4,36 @@ Simulation Module for Screen Time Roast Analyzer
 Main script to run the entire pipeline and simulate the user experience.
 """
 
-import pandas as pd
 import numpy as np
 import logging
-from typing import Dict, List, Tuple
-import os
+from typing import Dict, List
 import sys
 
-# Add src to path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from data_processor import DataProcessor
-from model_trainer import ModelTrainer
-from prompt_generator import generate_roast_prompt
+try:
+    from .data_processor import DataProcessor
+    from .model_trainer import ModelTrainer
+    from .prompt_generator import generate_roast_prompt
+except ImportError:
+    # Run as a script (python src/simulation.py): the sibling modules are on sys.path
+    from data_processor import DataProcessor
+    from model_trainer import ModelTrainer
+    from prompt_generator import generate_roast_prompt
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Columns read for each simulated user, with the value used when a column is missing
+# (a missing userId falls back to the user's position in the simulation)
+_USER_INFO_DEFAULTS = {
+    'userId': None,
+    'app_name': 'Unknown',
+    'usage_minutes': 0,
+    'roast_category_1': 'productivity',
+    'roast_intensity': 'medium',
+    'day_of_week': 'Monday'
+}
+
 
 class ScreenTimeSimulator:
     """Main simulator class that orchestrates the entire pipeline."""
@@ -83,29 +95,37 @@ class ScreenTimeSimulator:
         if self.processed_data is None:
             raise ValueError("Pipeline not run yet. Call run_complete_pipeline() first.")
         
-        logger.info(f"🎭 Simulating user experience with {num_samples} sample users...")
+        logger.info("🎭 Simulating user experience with %d sample users...", num_samples)
         
-        # Select random sample users
-        sample_users = self.processed_data.sample(n=min(num_samples, len(self.processed_data)))
+        # Select sample users from the processor's pre-shuffled pool
+        sample_users = self.processor.get_sample_users(num_samples)
         
-        simulation_results = []
+        # Predict all sample users in one call instead of one model call per user
+        # (sklearn rejects an empty batch, so skip the call when there are no users)
+        predictions = self.trainer.predict_usage(sample_users) if len(sample_users) else []
         
-        for idx, (_, user_data) in enumerate(sample_users.iterrows(), 1):
-            logger.info(f"👤 Processing User {idx}...")
+        simulation_results = []
+
+        # Fill in defaults for missing columns once, then walk plain tuples of just those fields
+        missing_columns = {col: default for col, default in _USER_INFO_DEFAULTS.items()
+                           if col not in sample_users.columns}
+        user_fields = sample_users.assign(**missing_columns)[list(_USER_INFO_DEFAULTS)]
+        
+        for idx, (user_id, app_name, actual_usage, roast_category, roast_intensity, day_of_week) in enumerate(
+                user_fields.itertuples(index=False, name=None), 1):
+            logger.info("👤 Processing User %d...", idx)
             
             # Extract user information
             user_info = {
-                'user_id': user_data.get('userId', f'user_{idx}'),
-                'app_name': user_data.get('app_name', 'Unknown'),
-                'actual_usage': user_data.get('usage_minutes', 0),
-                'roast_category': user_data.get('roast_category_1', 'productivity'),
-                'roast_intensity': user_data.get('roast_intensity', 'medium'),
-                'day_of_week': user_data.get('day_of_week', 'Monday')
+                'user_id': user_id if user_id is not None else f'user_{idx}',
+                'app_name': app_name,
+                'actual_usage': actual_usage,
+                'roast_category': roast_category,
+                'roast_intensity': roast_intensity,
+                'day_of_week': day_of_week
             }
             
-            # Make prediction
-            user_df = pd.DataFrame([user_data])
-            predicted_usage = self.trainer.predict_usage(user_df)[0]
+            predicted_usage = predictions[idx - 1]
             
             # Generate roast prompt
             roast_prompt = generate_roast_prompt(
@@ -143,29 +163,31 @@ class ScreenTimeSimulator:
         predicted = result['predicted_usage']
         actual = user_info['actual_usage']
         accuracy = result['prediction_accuracy']
-        
-        print(f"\n{'='*60}")
-        print(f"👤 USER {user_num} SIMULATION RESULTS")
-        print(f"{'='*60}")
-        
-        print(f"📱 App: {user_info['app_name']}")
-        print(f"🆔 User ID: {user_info['user_id']}")
-        print(f"📅 Day: {user_info['day_of_week']}")
-        print(f"🎯 Roast Category: {user_info['roast_category']}")
-        print(f"🔥 Roast Intensity: {user_info['roast_intensity']}")
-        
-        print(f"\n📊 USAGE PREDICTION:")
-        print(f"   Actual Usage: {actual:.0f} minutes ({actual/60:.1f} hours)")
-        print(f"   Predicted Usage: {predicted:.0f} minutes ({predicted/60:.1f} hours)")
-        print(f"   Prediction Error: {accuracy:.0f} minutes")
-        
         accuracy_percentage = (1 - accuracy / max(actual, predicted)) * 100
-        print(f"   Accuracy: {max(0, accuracy_percentage):.1f}%")
         
-        print(f"\n🎭 GENERATED ROAST PROMPT:")
-        print(f"{'─'*60}")
-        print(result['roast_prompt'])
-        print(f"{'─'*60}")
+        # Build the whole block and write it once instead of one print per line
+        output = f"""
+{'='*60}
+👤 USER {user_num} SIMULATION RESULTS
+{'='*60}
+📱 App: {user_info['app_name']}
+🆔 User ID: {user_info['user_id']}
+📅 Day: {user_info['day_of_week']}
+🎯 Roast Category: {user_info['roast_category']}
+🔥 Roast Intensity: {user_info['roast_intensity']}
+
+📊 USAGE PREDICTION:
+   Actual Usage: {actual:.0f} minutes ({actual/60:.1f} hours)
+   Predicted Usage: {predicted:.0f} minutes ({predicted/60:.1f} hours)
+   Prediction Error: {accuracy:.0f} minutes
+   Accuracy: {max(0, accuracy_percentage):.1f}%
+
+🎭 GENERATED ROAST PROMPT:
+{'─'*60}
+{result['roast_prompt']}
+{'─'*60}
+"""
+        sys.stdout.write(output)
     
     def generate_summary_report(self, pipeline_results: Dict, simulation_results: List[Dict]) -> None:
         """
@@ -175,64 +197,72 @@ class ScreenTimeSimulator:
             pipeline_results: Results from the ML pipeline
             simulation_results: Results from user simulations
         """
-        print(f"\n{'='*80}")
-        print("📋 SCREEN TIME ROAST ANALYZER - COMPREHENSIVE REPORT")
-        print(f"{'='*80}")
-        
-        # Data Overview
         data_insights = pipeline_results['data_insights']
-        print(f"\n📊 DATA OVERVIEW:")
-        print(f"   Total Users: {data_insights['user_stats']['total_users']}")
-        print(f"   Total Sessions: {data_insights['user_stats']['total_sessions']}")
-        print(f"   Unique Apps: {data_insights['user_stats']['unique_apps']}")
-        print(f"   Average Usage: {data_insights['user_stats']['avg_usage_minutes']:.1f} minutes")
-        print(f"   Total Usage Hours: {data_insights['user_stats']['total_usage_hours']:.1f} hours")
-        
-        # Model Performance
+        user_stats = data_insights['user_stats']
         training_results = pipeline_results['training_results']
         evaluation_results = pipeline_results['evaluation_results']
         
-        print(f"\n🤖 MODEL PERFORMANCE:")
-        print(f"   Model Type: {training_results['model_type']}")
-        print(f"   R² Score: {training_results['test_r2']:.3f}")
-        print(f"   Mean Absolute Error: {training_results['test_mae']:.1f} minutes")
-        print(f"   Cross-Validation R²: {training_results['cv_mean_r2']:.3f} ± {training_results['cv_std_r2']:.3f}")
-        print(f"   Accuracy within 30min: {evaluation_results['accuracy_within_30min']:.1%}")
+        # Data Overview and Model Performance
+        lines = [f"""
+{'='*80}
+📋 SCREEN TIME ROAST ANALYZER - COMPREHENSIVE REPORT
+{'='*80}
+
+📊 DATA OVERVIEW:
+   Total Users: {user_stats['total_users']}
+   Total Sessions: {user_stats['total_sessions']}
+   Unique Apps: {user_stats['unique_apps']}
+   Average Usage: {user_stats['avg_usage_minutes']:.1f} minutes
+   Total Usage Hours: {user_stats['total_usage_hours']:.1f} hours
+
+🤖 MODEL PERFORMANCE:
+   Model Type: {training_results['model_type']}
+   R² Score: {training_results['test_r2']:.3f}
+   Mean Absolute Error: {training_results['test_mae']:.1f} minutes
+   Cross-Validation R²: {training_results['cv_mean_r2']:.3f} ± {training_results['cv_std_r2']:.3f}
+   Accuracy within 30min: {evaluation_results['accuracy_within_30min']:.1%}
+
+📱 TOP APPS BY AVERAGE USAGE:"""]
         
         # Top Apps Analysis
         app_insights = data_insights['app_insights']
-        print(f"\n📱 TOP APPS BY AVERAGE USAGE:")
         sorted_apps = sorted(app_insights.items(), key=lambda x: x[1]['avg_usage'], reverse=True)
         for i, (app, stats) in enumerate(sorted_apps[:5], 1):
-            print(f"   {i}. {app}: {stats['avg_usage']:.1f} min avg ({stats['sessions']} sessions)")
+            lines.append(f"   {i}. {app}: {stats['avg_usage']:.1f} min avg ({stats['sessions']} sessions)")
         
         # Simulation Summary
         if simulation_results:
-            avg_accuracy = np.mean([r['prediction_accuracy'] for r in simulation_results])
-            print(f"\n🎭 SIMULATION SUMMARY:")
-            print(f"   Simulated Users: {len(simulation_results)}")
-            print(f"   Average Prediction Error: {avg_accuracy:.1f} minutes")
+            errors = np.fromiter((r['prediction_accuracy'] for r in simulation_results),
+                                 dtype=np.float64, count=len(simulation_results))
+            avg_accuracy = errors.mean()
             
-            # Most common apps in simulation
-            sim_apps = [r['user_info']['app_name'] for r in simulation_results]
-            unique_apps = list(set(sim_apps))
-            print(f"   Apps Simulated: {', '.join(unique_apps)}")
-        
-        print(f"\n🎯 SYSTEM CAPABILITIES:")
-        print(f"   ✅ Data Processing & Feature Engineering")
-        print(f"   ✅ ML Model Training & Evaluation")
-        print(f"   ✅ Usage Prediction")
-        print(f"   ✅ Dynamic Roast Prompt Generation")
-        print(f"   ✅ Multi-intensity Roasting (Light/Medium/Brutal)")
-        print(f"   ✅ App-specific Context Awareness")
-        print(f"   ✅ Cultural Adaptation (Hinglish)")
-        
-        print(f"\n🚀 READY FOR:")
-        print(f"   🔗 Gemini API Integration")
-        print(f"   📱 Mobile App Deployment")
-        print(f"   🌐 Web Interface")
-        print(f"   📊 Real-time Analytics")
-        print(f"   🎯 Personalized Interventions")
+            # Apps in simulation, in first-seen order
+            unique_apps = list(dict.fromkeys(r['user_info']['app_name'] for r in simulation_results))
+            
+            lines.append(f"""
+🎭 SIMULATION SUMMARY:
+   Simulated Users: {len(simulation_results)}
+   Average Prediction Error: {avg_accuracy:.1f} minutes
+   Apps Simulated: {', '.join(unique_apps)}""")
+        
+        lines.append("""
+🎯 SYSTEM CAPABILITIES:
+   ✅ Data Processing & Feature Engineering
+   ✅ ML Model Training & Evaluation
+   ✅ Usage Prediction
+   ✅ Dynamic Roast Prompt Generation
+   ✅ Multi-intensity Roasting (Light/Medium/Brutal)
+   ✅ App-specific Context Awareness
+   ✅ Cultural Adaptation (Hinglish)
+
+🚀 READY FOR:
+   🔗 Gemini API Integration
+   📱 Mobile App Deployment
+   🌐 Web Interface
+   📊 Real-time Analytics
+   🎯 Personalized Interventions""")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -267,7 +297,7 @@ def main():
         return 0
         
     except Exception as e:
-        logger.error(f"❌ Simulation failed: {str(e)}")
+        logger.error("❌ Simulation failed: %s", e)
         return 1
 
 